@@ -1,58 +1,331 @@
-from fastapi import FastAPI, HTTPException, Query, Path, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Path, status
 from typing import Any, Dict, Optional, List
-from sqlalchemy import create_engine, select, asc, desc, func
-from sqlalchemy.orm import declarative_base, mapped_column, Mapped, Session
-from sqlalchemy.types import Integer, String, Float, Boolean
-from datetime import datetime, timezone
+from sqlalchemy import create_engine, select, insert, update, lambda_stmt, asc, desc, func, event, table, column, literal_column, Index
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.orm import declarative_base, mapped_column, Mapped, Session, sessionmaker
+from sqlalchemy.types import Integer, String, Float, Boolean, BigInteger, TypeDecorator
+from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel, Field, field_validator, ConfigDict
+from pydantic_core import to_json
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import FileResponse, Response
+from time import time_ns
 import os
+import re
+
+# В Docker БД лежит в отдельном каталоге /app/data: в WAL-режиме рядом с ней живут lab.db-wal и lab.db-shm,
+# и монтировать нужно каталог целиком, а не один файл
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///lab.db")
+
+# WAL: читатели не блокируют писателя; synchronous=NORMAL — fsync на чекпоинтах, а не на каждом коммите
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def create_db_engine(url: str):
+    """Engine приложения: пул постоянных соединений (QueuePool) и PRAGMA на каждом новом соединении.
+
+    StaticPool не используется: одно соединение на все потоки обработчиков смешало бы транзакции
+    параллельных запросов, а QueuePool и так держит соединения открытыми между запросами.
+    """
+    db_engine = create_engine(
+        url,
+        echo=False,
+        future=True,
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=20,
+        max_overflow=10,
+    )
+    event.listen(db_engine, "connect", set_sqlite_pragmas)
+    return db_engine
+
 
-DATABASE_URL = "sqlite:///lab.db"
-engine = create_engine(DATABASE_URL, echo=False, future=True)
+engine = create_db_engine(DATABASE_URL)
+SessionLocal = sessionmaker(autoflush=False, expire_on_commit=False, future=True)
 Base = declarative_base()
 
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+# YYYY-MM-DD[(T| )HH:MM[:SS[.ffffff]][Z|±HH[:]MM]]; только ASCII-цифры ([0-9], а не \d)
+ISO_DATETIME_RE = re.compile(
+    r"([0-9]{4})-([0-9]{2})-([0-9]{2})"
+    r"(?:[T ]([0-9]{2}):([0-9]{2})(?::([0-9]{2})(?:\.([0-9]{1,6}))?)?"
+    r"(Z|([+-])([0-9]{2}):?([0-9]{2}))?)?"
+)
+
+
+def parse_iso_datetime(value: str) -> datetime:
+    """Разбор ISO 8601 регулярным выражением и прямым вызовом конструктора datetime.
+
+    Время без часового пояса считается UTC. ValueError — если строка не ISO 8601 или дата невозможна.
+    """
+    m = ISO_DATETIME_RE.fullmatch(value)
+    if m is None:
+        raise ValueError(f"not an ISO 8601 datetime: {value!r}")
+    year, month, day, hour, minute, second, fraction, tz, tz_sign, tz_hours, tz_minutes = m.groups()
+    if tz is None or tz == "Z":
+        tzinfo = timezone.utc
+    else:
+        if int(tz_minutes) >= 60:
+            raise ValueError(f"invalid UTC offset: {tz}")
+        offset = timedelta(hours=int(tz_hours), minutes=int(tz_minutes))
+        tzinfo = timezone(-offset if tz_sign == "-" else offset)
+    return datetime(
+        int(year), int(month), int(day),
+        int(hour or 0), int(minute or 0), int(second or 0),
+        int(fraction.ljust(6, "0")) if fraction else 0,
+        tzinfo=tzinfo,
+    )
+
+
+def iso_to_epoch_us(value: str) -> int:
+    """ISO 8601 -> микросекунды от эпохи (UTC).
+
+    ValueError — и для дат, которые после перевода в UTC выходят за пределы 0001..9999 годов
+    (например 9999-12-31T23:00:00-05:00): такое значение нельзя было бы прочитать обратно.
+    """
+    try:
+        dt = parse_iso_datetime(value).astimezone(timezone.utc)
+    except OverflowError:
+        raise ValueError(f"datetime out of range in UTC: {value!r}")
+    return (dt - EPOCH) // ONE_MICROSECOND
+
+
+def now_epoch_us() -> int:
+    """Текущее время в микросекундах от эпохи — без создания datetime и форматирования строки."""
+    return time_ns() // 1000
+
+
+def epoch_us_to_iso(value: int) -> str:
+    """Микросекунды от эпохи -> ISO 8601 в UTC с суффиксом Z."""
+    return (EPOCH + timedelta(microseconds=value)).isoformat().replace('+00:00', 'Z')
+
+
+class IsoTimestamp(str):
+    """Строка ISO 8601 с уже известным значением в микросекундах: EpochMicros записывает epoch_us без повторного разбора."""
+    epoch_us: int
+
+
+def iso_timestamp(epoch_us: int) -> IsoTimestamp:
+    value = IsoTimestamp(epoch_us_to_iso(epoch_us))
+    value.epoch_us = epoch_us
+    return value
+
+
+def now_iso() -> IsoTimestamp:
+    """Текущее время для default колонки: значение того же типа (str), что и атрибут модели."""
+    return iso_timestamp(now_epoch_us())
+
+
+class EpochMicros(TypeDecorator):
+    """Дата/время: в API — строка ISO 8601, в БД — целое число микросекунд (компактный индекс, целочисленное сравнение)."""
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        # int приходит только из Core-выражений (фильтры list_items, update_task, миграция), не из атрибутов ORM
+        if value is None or isinstance(value, int):
+            return value
+        if isinstance(value, IsoTimestamp):
+            return value.epoch_us
+        return iso_to_epoch_us(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return value
+        return epoch_us_to_iso(value)
+
 
 class Task(Base):
     __tablename__ = "tasks"
+    # Составной индекс под самую частую комбинацию фильтров list_items (покрывает и фильтр по одному is_done)
+    __table_args__ = (Index("ix_tasks_done_prio_due", "is_done", "priority", "due_date"),)
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # Индексов нет: подстроку ищет FTS5 (tasks_fts), а LIKE '%q%' индекс использовать не может
     title: Mapped[str] = mapped_column(String, nullable=False)
     details: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     is_done: Mapped[bool] = mapped_column(Boolean, default=False)
-    priority: Mapped[int] = mapped_column(Integer, default=1)
-    due_date: Mapped[Optional[str]] = mapped_column(String, nullable=True)
-    created_at: Mapped[str] = mapped_column(String, nullable=False, default=lambda: datetime.now(timezone.utc).isoformat())
-    updated_at: Mapped[Optional[str]] = mapped_column(String, nullable=True)
-
-Base.metadata.create_all(engine)
+    priority: Mapped[int] = mapped_column(Integer, default=1, index=True)
+    due_date: Mapped[Optional[str]] = mapped_column(EpochMicros, nullable=True, index=True)
+    created_at: Mapped[str] = mapped_column(EpochMicros, nullable=False, index=True, default=now_iso)
+    updated_at: Mapped[Optional[str]] = mapped_column(EpochMicros, nullable=True)
+
+
+# Полнотекстовый индекс FTS5 по title/details (external content над tasks), синхронизируется триггерами.
+# Токенизатор trigram сохраняет семантику поиска по подстроке без учёта регистра (запросы от 3 символов).
+FTS_MIN_QUERY_LEN = 3
+TASKS_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, details, content='tasks', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, details) VALUES (new.id, new.title, new.details);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, details) VALUES ('delete', old.id, old.title, old.details);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, details ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, details) VALUES ('delete', old.id, old.title, old.details);
+        INSERT INTO tasks_fts(rowid, title, details) VALUES (new.id, new.title, new.details);
+    END""",
+)
+tasks_fts = table("tasks_fts", column("rowid"))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_tasks_fts(target, connection, **kw):
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+    ).first()
+    for ddl in TASKS_FTS_DDL:
+        connection.exec_driver_sql(ddl)
+    if not exists:
+        # Индекс создан поверх уже существующих строк — заполняем его из tasks
+        connection.exec_driver_sql("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+
+
+# Версия схемы хранится в PRAGMA user_version.
+# 0 — пустая БД или таблица tasks ранней версии: даты строками ISO 8601, без индексов и FTS.
+SCHEMA_VERSION = 1
+LEGACY_TIMESTAMP_COLUMNS = ("due_date", "created_at", "updated_at")
+
+
+def legacy_to_epoch_us(value):
+    """Дата из таблицы версии 0 -> микросекунды от эпохи.
+
+    Строки разбираются так же, как их принимала прежняя версия API (datetime.fromisoformat);
+    строки из цифр — уже микросекунды, записанные в колонку с текстовым типом.
+    """
+    if value is None or isinstance(value, int):
+        return value
+    if value.lstrip("-").isdigit():
+        return int(value)
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt.astimezone(timezone.utc) - EPOCH) // ONE_MICROSECOND
+
+
+def migrate_tasks_v0(connection):
+    """Пересоздаёт tasks по текущей схеме и переносит строки, переводя даты в микросекунды."""
+    for trigger in ("tasks_fts_ai", "tasks_fts_ad", "tasks_fts_au"):
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+    connection.exec_driver_sql("DROP TABLE IF EXISTS tasks_fts")
+    connection.exec_driver_sql("ALTER TABLE tasks RENAME TO tasks_v0")
+    # Индексы переезжают вместе с таблицей, а их имена нужны новой схеме
+    indexes = connection.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'tasks_v0' AND sql IS NOT NULL"
+    ).scalars().all()
+    for index in indexes:
+        connection.exec_driver_sql(f'DROP INDEX "{index}"')
+
+    # Новая таблица, индексы и FTS (строки попадают в tasks_fts через триггер на INSERT)
+    Base.metadata.create_all(connection)
+
+    rows = []
+    for row in connection.exec_driver_sql(
+        "SELECT id, title, details, is_done, priority, due_date, created_at, updated_at FROM tasks_v0"
+    ).mappings():
+        row = dict(row)
+        try:
+            for name in LEGACY_TIMESTAMP_COLUMNS:
+                row[name] = legacy_to_epoch_us(row[name])
+        except (ValueError, OverflowError) as exc:
+            raise RuntimeError(
+                f"Не удалось перенести задачу id={row['id']} в схему версии {SCHEMA_VERSION}: "
+                f"некорректная дата ({exc}). Исправьте строку в таблице tasks и перезапустите приложение"
+            ) from exc
+        rows.append(row)
+    if rows:
+        connection.execute(insert(Task.__table__), rows)
+    connection.exec_driver_sql("DROP TABLE tasks_v0")
+
+
+def create_schema(bind):
+    """Создаёт схему или обновляет её до SCHEMA_VERSION."""
+    with bind.connect() as connection:
+        # Транзакцией управляем сами: BEGIN IMMEDIATE берёт блокировку на запись, поэтому при старте
+        # нескольких воркеров uvicorn схему создаёт/мигрирует один, а остальные ждут и видят результат
+        connection.execution_options(isolation_level="AUTOCOMMIT")
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+            if version < SCHEMA_VERSION:
+                has_tasks = connection.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks'"
+                ).first()
+                if has_tasks:
+                    migrate_tasks_v0(connection)
+                else:
+                    Base.metadata.create_all(connection)
+                connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            connection.exec_driver_sql("COMMIT")
+        except BaseException:
+            connection.exec_driver_sql("ROLLBACK")
+            raise
+
+
+create_schema(engine)
 application = FastAPI(title="ToDo")
 
-class TaskBase(BaseModel):
+
+def get_db():
+    # engine берётся из модуля в момент запроса (тесты подменяют app_main.engine)
+    session = SessionLocal(bind=engine)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+class TaskFields(BaseModel):
+    """Поля задачи. Ограничения Field проверяются в pydantic-core, без Python-валидаторов."""
     title: str = Field(..., min_length=3, description="Заголовок задачи (минимум 3 символа)")
     details: Optional[str] = Field(None, description="Дополнительные сведения")
     is_done: bool = Field(False, description="Статус выполнения")
     priority: int = Field(1, ge=1, le=3, description="Приоритет: 1 (низкий), 2 (средний), 3 (высокий)")
-    due_date: Optional[str] = Field(None, description="Дата/время дедлайна в формате ISO 8601")
+    due_date: Optional[str] = Field(
+        None,
+        description="Дата/время дедлайна в формате ISO 8601: YYYY-MM-DD[THH:MM[:SS[.ffffff]][Z|±HH:MM]], без пояса — UTC"
+    )
+
 
-    @field_validator("due_date", mode='before')
+class TaskBase(TaskFields):
+    """Входные данные: к ограничениям полей добавляются Python-валидаторы."""
+
+    @field_validator("due_date")
     @classmethod
     def validate_due_date(cls, v):
+        # Разбор выполняется один раз: результат едет до INSERT/UPDATE в IsoTimestamp.epoch_us
         if v is None:
             return v
-        if not isinstance(v, str):
-            raise ValueError("due_date must be a string")
         try:
-            dt_str = v.replace('Z', '+00:00')
-            datetime.fromisoformat(dt_str)
+            value = IsoTimestamp(v)
+            value.epoch_us = iso_to_epoch_us(v)
         except ValueError:
             raise ValueError("due_date must be a valid ISO 8601 datetime string")
-        return v
+        return value
 
     @field_validator("title")
     @classmethod
     def title_must_not_be_all_whitespace(cls, v):
-        if not v.strip():
+        # isspace(), в отличие от strip(), не создаёт копию строки
+        if not v or v.isspace():
             raise ValueError("title must contain non-whitespace characters")
         return v
 
@@ -60,139 +333,188 @@ class TaskCreate(TaskBase):
     pass
 
 class TaskUpdate(TaskBase):
-    title: Optional[str] = Field(None, min_length=3)
-    is_done: Optional[bool] = None
-    priority: Optional[int] = Field(None, ge=1, le=3)
+    # Поля NOT NULL: не указаны — не меняются (значение по умолчанию не валидируется), явный null — 422
+    title: str = Field(None, min_length=3)
+    is_done: bool = None
+    priority: int = Field(None, ge=1, le=3)
     due_date: Optional[str] = None
     details: Optional[str] = None
 
-    @field_validator("title", mode='before')
-    @classmethod
-    def title_not_empty_if_provided(cls, v):
-        if v is not None and not v.strip():
-            raise ValueError("title must contain non-whitespace characters if provided")
-        return v
-
 
-class TaskResponse(TaskBase):
+# Ответы строятся из уже проверенных при записи данных — входные валидаторы на них не запускаются
+class TaskResponse(TaskFields):
     id: int
     created_at: str
     updated_at: Optional[str]
 
     model_config = ConfigDict(from_attributes=True)
 
+
+# Тело ответа health-check не меняется — отдаём готовые байты без JSON-сериализации
+HEALTH_BODY = b'{"status":"ok"}'
+
+
 @application.get("/health", tags=["system"])
-def health():
-    return {"status": "ok"}
+async def health():
+    return Response(content=HEALTH_BODY, media_type="application/json")
+
+
+def _parse_due_param(name: str, value: str) -> int:
+    try:
+        return iso_to_epoch_us(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Некорректная дата в {name}: {value}. Ожидается ISO 8601"
+        )
 
 
-@application.get("/tasks", response_model=List[TaskResponse], tags=["tasks"])
+# Допустимые значения sort/order и соответствующие им выражения сортировки
+FTS_RANK = func.bm25(literal_column("tasks_fts"))
+SORT_COLUMNS = {
+    "created_at": Task.created_at,
+    "due_date": Task.due_date,
+    "priority": Task.priority,
+    "relevance": FTS_RANK,
+}
+SORT_ORDERS = {"asc": asc, "desc": desc}
+
+# Колонки ответа списка: выбираются Core-запросом как кортежи, без создания ORM-объектов
+LIST_COLUMNS = (
+    Task.id,
+    Task.title,
+    Task.details,
+    Task.is_done,
+    Task.priority,
+    Task.due_date,
+    Task.created_at,
+    Task.updated_at,
+)
+
+
+@application.get("/tasks", responses={200: {"model": List[TaskResponse]}}, tags=["tasks"])
 def list_items(
     q: Optional[str] = Query(None, description="Поиск по подстроке в title и details (без учёта регистра)"),
     is_done: Optional[bool] = Query(None, description="Фильтр по статусу выполнения"),
     priority: Optional[int] = Query(None, ge=1, le=3, description="Фильтр по приоритету (1–3)"),
     due_before: Optional[str] = Query(None, description="Задачи с due_date <= указанной даты (ISO 8601)"),
     due_after: Optional[str] = Query(None, description="Задачи с due_date >= указанной даты (ISO 8601)"),
-    sort: str = Query("created_at", description="Поле сортировки: created_at, due_date, priority"),
+    sort: str = Query("created_at", description="Поле сортировки: created_at, due_date, priority, relevance (при поиске q)"),
     order: str = Query("asc", description="Порядок: asc или desc"),
     offset: int = Query(0, ge=0),
-    limit: int = Query(50, ge=1, le=100)
+    limit: int = Query(50, ge=1, le=100),
+    session: Session = Depends(get_db)
 ):
-    valid_sort_fields = {"created_at", "due_date", "priority"}
-    if sort not in valid_sort_fields:
+    sort_col = SORT_COLUMNS.get(sort)
+    if sort_col is None:
         raise HTTPException(
             status_code=400,
-            detail=f"Недопустимое значение sort: {sort}. Допустимые: {', '.join(valid_sort_fields)}"
+            detail=f"Недопустимое значение sort: {sort}. Допустимые: {', '.join(SORT_COLUMNS)}"
         )
 
-    if order not in {"asc", "desc"}:
+    order_func = SORT_ORDERS.get(order)
+    if order_func is None:
         raise HTTPException(
             status_code=400,
             detail="Порядок сортировки должен быть 'asc' или 'desc'"
         )
 
-    with Session(engine) as session:
-        stmt = select(Task)
-
-        if q:
-            ql = f"%{q.lower()}%"
-            stmt = stmt.where(
-                (func.lower(Task.title).like(ql)) |
-                ((Task.details.is_not(None)) & (func.lower(Task.details).like(ql)))
-            )
-
-        if is_done is not None:
-            stmt = stmt.where(Task.is_done == is_done)
-        if priority is not None:
-            stmt = stmt.where(Task.priority == priority)
-        if due_before is not None:
-            stmt = stmt.where(Task.due_date <= due_before)
-        if due_after is not None:
-            stmt = stmt.where(Task.due_date >= due_after)
-
-        sort_col = getattr(Task, sort)
-        stmt = stmt.order_by(desc(sort_col) if order == "desc" else asc(sort_col))
-        stmt = stmt.offset(offset).limit(limit)
+    if q and "\x00" in q:
+        # FTS5 обрезает фразу на NUL и падает с синтаксической ошибкой
+        raise HTTPException(
+            status_code=400,
+            detail="Параметр q не должен содержать NUL-символ"
+        )
 
-        tasks = session.scalars(stmt).all()
-        return tasks
+    use_fts = bool(q) and len(q) >= FTS_MIN_QUERY_LEN
+    if sort_col is FTS_RANK and not use_fts:
+        # Без полнотекстового поиска релевантности нет — сортируем по дате создания
+        sort_col = Task.created_at
+    order_clause = order_func(sort_col)
+
+    # lambda_stmt кэширует скомпилированный SQL по набору лямбд (т.е. по комбинации фильтров);
+    # значения из замыканий (q, is_done, limit, ...) подставляются как параметры
+    stmt = lambda_stmt(lambda: select(*LIST_COLUMNS))
+
+    if use_fts:
+        # Запрос передаётся в MATCH как фраза, чтобы спецсимволы FTS5 не трактовались как синтаксис
+        phrase = '"' + q.replace('"', '""') + '"'
+        stmt += lambda s: s.join(tasks_fts, tasks_fts.c.rowid == Task.id).where(
+            literal_column("tasks_fts").op("MATCH")(phrase)
+        )
+    elif q:
+        # Слишком короткий запрос для trigram-индекса — ищем через LIKE (в SQLite он сам не учитывает регистр ASCII)
+        ql = f"%{q}%"
+        # details IS NULL даёт NULL в LIKE, и ветка OR просто не срабатывает — отдельная проверка не нужна
+        stmt += lambda s: s.where(Task.title.like(ql) | Task.details.like(ql))
+
+    if is_done is not None:
+        stmt += lambda s: s.where(Task.is_done == is_done)
+    if priority is not None:
+        stmt += lambda s: s.where(Task.priority == priority)
+    if due_before is not None:
+        due_before_us = _parse_due_param("due_before", due_before)
+        stmt += lambda s: s.where(Task.due_date <= due_before_us)
+    if due_after is not None:
+        due_after_us = _parse_due_param("due_after", due_after)
+        stmt += lambda s: s.where(Task.due_date >= due_after_us)
+
+    stmt += lambda s: s.order_by(order_clause).offset(offset).limit(limit)
+
+    rows = session.execute(stmt).all()
+    # Значения уже приведены типами колонок (bool, ISO-строки дат) — сериализуем в pydantic-core без валидации
+    return Response(content=to_json([row._asdict() for row in rows]), media_type="application/json")
 
 
 @application.get("/tasks/{task_id}", response_model=TaskResponse, tags=["tasks"])
-def get_task(task_id: int = Path(ge=1)):
-    with Session(engine) as session:
-        task = session.get(Task, task_id)
-        if not task:
-            raise HTTPException(status_code=404, detail="Task not found")
-        return task
+def get_task(task_id: int = Path(ge=1), session: Session = Depends(get_db)):
+    task = session.get(Task, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
 
 
 @application.post("/tasks", response_model=TaskResponse, status_code=status.HTTP_201_CREATED, tags=["tasks"])
-def create_task(task: TaskCreate):
-    now = datetime.now(timezone.utc).isoformat()
-    obj = Task(
+def create_task(task: TaskCreate, session: Session = Depends(get_db)):
+    # INSERT ... RETURNING: id и created_at приходят тем же запросом, без refresh
+    stmt = insert(Task).values(
         title=task.title,
         details=task.details,
         is_done=task.is_done,
         priority=task.priority,
         due_date=task.due_date,
-        created_at=now,
         updated_at=None
-    )
+    ).returning(Task)
 
-    with Session(engine) as session:
-        session.add(obj)
-        session.commit()
-        session.refresh(obj)
-        return obj
+    obj = session.execute(stmt).scalar_one()
+    session.commit()
+    return obj
 
 
 @application.put("/tasks/{task_id}", response_model=TaskResponse, tags=["tasks"])
-def update_task(task_id: int = Path(ge=1), task: TaskUpdate = ...):
-    with Session(engine) as session:
-        obj = session.get(Task, task_id)
-        if not obj:
-            raise HTTPException(status_code=404, detail="Task not found")
-
-        update_data = task.model_dump(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(obj, key, value)
-
-        obj.updated_at = datetime.now(timezone.utc).isoformat()
-        session.commit()
-        session.refresh(obj)
-        return obj
+def update_task(task_id: int = Path(ge=1), task: TaskUpdate = ..., session: Session = Depends(get_db)):
+    # Один UPDATE ... RETURNING вместо SELECT + setattr по полям + UPDATE + SELECT
+    stmt = (
+        update(Task)
+        .where(Task.id == task_id)
+        .values(**task.model_dump(exclude_unset=True), updated_at=now_epoch_us())
+        .returning(Task)
+    )
+    obj = session.execute(stmt).scalar_one_or_none()
+    if obj is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    session.commit()
+    return obj
 
 
 @application.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["tasks"])
-def delete_task(task_id: int = Path(ge=1)):
-    with Session(engine) as session:
-        obj = session.get(Task, task_id)
-        if not obj:
-            raise HTTPException(status_code=404, detail="Task not found")
-        session.delete(obj)
-        session.commit()
-        return
+def delete_task(task_id: int = Path(ge=1), session: Session = Depends(get_db)):
+    obj = session.get(Task, task_id)
+    if not obj:
+        raise HTTPException(status_code=404, detail="Task not found")
+    session.delete(obj)
+    session.commit()
+    return
 
 
 # Определяем путь к папке static относительно app_main.py
@@ -202,8 +524,10 @@ static_dir = os.path.join(current_dir, "static")
 # Подключаем статику
 application.mount("/static", StaticFiles(directory=static_dir), name="static")
 
-# Главная страница — отдаём index.html
-@application.get("/", response_class=HTMLResponse, include_in_schema=False)
-def read_root():
-    with open(os.path.join(static_dir, "index.html"), "r", encoding="utf-8") as f:
-        return HTMLResponse(f.read())
\ No newline at end of file
+# Главная страница — отдаём index.html с диска (FileResponse, без чтения файла в Python на каждый запрос)
+INDEX_PATH = os.path.join(static_dir, "index.html")
+
+
+@application.get("/", response_class=FileResponse, include_in_schema=False)
+async def read_root():
+    return FileResponse(INDEX_PATH, media_type="text/html")
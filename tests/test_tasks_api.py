@@ -1,13 +1,14 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text
+from sqlalchemy.orm import Session, sessionmaker
 from datetime import datetime, timezone
+import sqlite3
 import tempfile
 import os
 
 # Импортируем приложение и модели из основного модуля
-from app.app_main import application, Task, Base, TaskCreate, TaskUpdate
+from app.app_main import application, Task, Base, TaskCreate, TaskUpdate, TaskResponse, create_db_engine, create_schema, SCHEMA_VERSION
 
 # Фикстура: временная БД и клиент
 @pytest.fixture(scope="function")
@@ -16,8 +17,8 @@ def client():
     os.close(db_fd)
 
     test_db_url = f"sqlite:///{db_path}"
-    test_engine = create_engine(test_db_url, echo=False, future=True)
-    Base.metadata.create_all(bind=test_engine)
+    test_engine = create_db_engine(test_db_url)
+    create_schema(test_engine)
 
     # Подменяем engine в app_main
     import app.app_main
@@ -61,6 +62,62 @@ def create_task_in_db(session, **kwargs):
     return task
 
 
+# Фикстура: БД, созданная первой версией приложения (даты строками, без индексов и FTS)
+@pytest.fixture(scope="function")
+def legacy_engine(tmp_path):
+    db_path = tmp_path / "legacy.db"
+    legacy = sqlite3.connect(db_path)
+    legacy.execute(
+        "CREATE TABLE tasks (id INTEGER NOT NULL, title VARCHAR NOT NULL, details VARCHAR, "
+        "is_done BOOLEAN, priority INTEGER, due_date VARCHAR, created_at VARCHAR NOT NULL, "
+        "updated_at VARCHAR, PRIMARY KEY (id))"
+    )
+    legacy.execute(
+        "INSERT INTO tasks VALUES (7, 'Buy milk', '2 liters', 0, 2, '2025-12-31T10:00+05', "
+        "'2025-01-01T10:00:00+00:00', '2025-01-02T10:00:00.123456+00:00')"
+    )
+    legacy.commit()
+    legacy.close()
+
+    test_engine = create_db_engine(f"sqlite:///{db_path}")
+    yield test_engine
+    test_engine.dispose()
+
+
+# Тест миграции старой БД на текущую схему
+def test_create_schema_migrates_legacy_db(legacy_engine):
+    create_schema(legacy_engine)
+    create_schema(legacy_engine)  # повторный запуск ничего не меняет
+
+    with legacy_engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA user_version").scalar() == SCHEMA_VERSION
+        assert conn.exec_driver_sql("SELECT typeof(due_date), typeof(created_at) FROM tasks").one() == ("integer", "integer")
+        plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN SELECT * FROM tasks ORDER BY created_at").all()
+        assert "USING INDEX ix_tasks_created_at" in plan[0][-1]
+        assert conn.exec_driver_sql("SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH '\"MILK\"'").scalars().all() == [7]
+
+    with Session(legacy_engine) as session:
+        task = session.get(Task, 7)
+        assert task.due_date == "2025-12-31T05:00:00Z"
+        assert task.created_at == "2025-01-01T10:00:00Z"
+        assert task.updated_at == "2025-01-02T10:00:00.123456Z"
+
+
+# created_at по умолчанию имеет тип атрибута (строка ISO 8601) уже после flush, без перечитывания из БД
+def test_orm_default_created_at_is_iso_string(client, db_session):
+    task = Task(title="ORM task")
+    db_session.add(task)
+    db_session.flush()
+    assert isinstance(task.created_at, str)
+    assert task.created_at.endswith("Z")
+    assert TaskResponse.model_validate(task).created_at == task.created_at
+    db_session.commit()
+
+    # В БД записано то же значение
+    db_session.expire(task)
+    assert task.created_at == TaskResponse.model_validate(task).created_at
+
+
 # Тесты /health
 def test_health(client):
     response = client.get("/health")
@@ -68,6 +125,14 @@ def test_health(client):
     assert response.json() == {"status": "ok"}
 
 
+# Тесты главной страницы
+def test_read_root(client):
+    response = client.get("/")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    assert "<html" in response.text.lower()
+
+
 # Тесты POST /tasks
 def test_create_task_success(client):
     task_data = {
@@ -117,6 +182,46 @@ def test_create_task_validation_errors(client):
     response = client.post("/tasks", json={"title": "Test", "due_date": "invalid-date"})
     assert response.status_code == 422
 
+    # due_date, который в UTC выходит за пределы 0001..9999 годов
+    response = client.post("/tasks", json={"title": "Test", "due_date": "9999-12-31T23:00:00-05:00"})
+    assert response.status_code == 422
+    response = client.post("/tasks", json={"title": "Test", "due_date": "0001-01-01T00:00:00+01:00"})
+    assert response.status_code == 422
+
+
+def test_create_task_due_date_formats(client):
+    # Дробная часть секунд дополняется нулями до микросекунд
+    response = client.post("/tasks", json={"title": "Fraction", "due_date": "2025-12-31T10:00:00.5Z"})
+    assert response.status_code == 201
+    assert response.json()["due_date"] == "2025-12-31T10:00:00.500000Z"
+
+    invalid = [
+        "2025-02-30T00:00:00Z",       # несуществующая дата — отклоняет конструктор datetime
+        "2025-12-31T10:00:00+05:60",  # минуты смещения вне диапазона
+        "2025-12-31T10:00:00+24:00",  # смещение не меньше суток
+        "٢٠٢٥-١٢-٣١",                 # не-ASCII цифры
+        "2025-12-31T10:00+05",        # смещение без минут
+        "20251231T101010Z",           # базовый формат без разделителей
+    ]
+    for value in invalid:
+        response = client.post("/tasks", json={"title": "Bad date", "due_date": value})
+        assert response.status_code == 422, value
+
+
+def test_due_date_parsed_once_per_write(client, monkeypatch):
+    import app.app_main
+    calls = []
+    parse = app.app_main.parse_iso_datetime
+    monkeypatch.setattr(app.app_main, "parse_iso_datetime", lambda v: calls.append(v) or parse(v))
+
+    response = client.post("/tasks", json={"title": "Parse once", "due_date": "2025-12-31T10:00:00+03:00"})
+    assert response.json()["due_date"] == "2025-12-31T07:00:00Z"
+    assert len(calls) == 1
+
+    response = client.put(f"/tasks/{response.json()['id']}", json={"due_date": "2026-01-01T00:00:00Z"})
+    assert response.json()["due_date"] == "2026-01-01T00:00:00Z"
+    assert len(calls) == 2
+
 
 # Тесты GET /tasks
 def test_list_tasks_filters_and_sorting(client, db_session):
@@ -169,6 +274,63 @@ def test_list_tasks_filters_and_sorting(client, db_session):
     assert response.status_code == 400
 
 
+def test_list_tasks_search(client, db_session):
+    db_session.execute(text("DELETE FROM tasks"))
+    db_session.commit()
+
+    create_task_in_db(db_session, title="Write report", details="Quarterly numbers")
+    create_task_in_db(db_session, title="Report review", details="Read the REPORT twice, report")
+    create_task_in_db(db_session, title="Call mom")
+
+    # Поиск по подстроке без учёта регистра, в том числе по details
+    response = client.get("/tasks?q=ARTERL")
+    assert [t["title"] for t in response.json()] == ["Write report"]
+
+    response = client.get("/tasks?q=report")
+    assert len(response.json()) == 2
+
+    # Сортировка по релевантности: больше совпадений — выше
+    response = client.get("/tasks?q=report&sort=relevance")
+    assert response.json()[0]["title"] == "Report review"
+
+    # Короткий запрос и спецсимволы FTS5 не ломают поиск
+    response = client.get("/tasks?q=mo")
+    assert [t["title"] for t in response.json()] == ["Call mom"]
+    response = client.get("/tasks?q=MO")
+    assert [t["title"] for t in response.json()] == ["Call mom"]
+
+    response = client.get('/tasks?q="rep*')
+    assert response.status_code == 200
+    assert response.json() == []
+
+    response = client.get("/tasks?q=x%00yz")
+    assert response.status_code == 400
+
+    # Индекс следует за обновлениями и удалениями
+    task_id = client.get("/tasks?q=Call").json()[0]["id"]
+    client.put(f"/tasks/{task_id}", json={"title": "Call dad"})
+    assert client.get("/tasks?q=mom").json() == []
+    assert len(client.get("/tasks?q=dad").json()) == 1
+
+    client.delete(f"/tasks/{task_id}")
+    assert client.get("/tasks?q=dad").json() == []
+
+
+def test_list_tasks_due_date_filters_respect_timezone(client):
+    # 2025-12-20T23:00:00-05:00 == 2025-12-21T04:00:00Z — позже, чем 2025-12-21T00:00:00Z
+    response = client.post("/tasks", json={"title": "Late task", "due_date": "2025-12-20T23:00:00-05:00"})
+    assert response.json()["due_date"] == "2025-12-21T04:00:00Z"
+    task_id = response.json()["id"]
+
+    ids = [t["id"] for t in client.get("/tasks?due_after=2025-12-21T00:00:00Z").json()]
+    assert task_id in ids
+    ids = [t["id"] for t in client.get("/tasks?due_before=2025-12-21T00:00:00Z").json()]
+    assert task_id not in ids
+
+    response = client.get("/tasks?due_before=not-a-date")
+    assert response.status_code == 400
+
+
 # Тесты GET /tasks/{id}
 def test_get_task_by_id(client):
     response = client.post("/tasks", json={"title": "Find me"})
@@ -212,6 +374,21 @@ def test_update_task_validation_error(client):
     response = client.put(f"/tasks/{task_id}", json={"title": "ab"})  # слишком коротко
     assert response.status_code == 422
 
+    response = client.put(f"/tasks/{task_id}", json={"title": "    "})  # только пробелы
+    assert response.status_code == 422
+
+    response = client.put(f"/tasks/{task_id}", json={"title": 123})  # не строка
+    assert response.status_code == 422
+
+    # null для полей NOT NULL
+    for field in ("title", "is_done", "priority"):
+        response = client.put(f"/tasks/{task_id}", json={field: None})
+        assert response.status_code == 422
+
+    # null для необязательных полей допустим
+    response = client.put(f"/tasks/{task_id}", json={"details": None, "due_date": None})
+    assert response.status_code == 200
+
 
 def test_update_nonexistent_task(client):
     response = client.put("/tasks/999999", json={"title": "New title"})